@@ -1,12 +1,21 @@
 import os
 import json
+import pickle
 import logging
 import asyncio
 import random
+import re
+from bisect import bisect_right
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timezone, timedelta, time as dtime
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import BinaryIO, Dict, List, Tuple, Optional
+
+try:  # optional C-accelerated JSON codec; see json_loads()/json_dumps()
+    import orjson
+except ImportError:
+    orjson = None
 
 from telegram import (
     Update,
@@ -14,12 +23,14 @@ from telegram import (
     InlineKeyboardMarkup,
     constants,
 )
+from telegram.error import BadRequest
 from telegram.ext import (
     ApplicationBuilder,
     CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
     MessageHandler,
+    PersistenceInput,
     PicklePersistence,
     filters,
 )
@@ -34,21 +45,32 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 MENULIST_FILE = DATA_DIR / "Menulist.json"
 MENU_AND_DISHES_FILE = DATA_DIR / "MenuAndDishes.json"
 FAQ_FILE = DATA_DIR / "faq.json"
-DASHBOARD_FILE = DATA_DIR / "dashboard.json"
-LOGIN_FILE = DATA_DIR / "login.json"
+DASHBOARD_FILE = DATA_DIR / "dashboard.jsonl"  # append-only, one JSON object per line
+LEGACY_DASHBOARD_FILE = DATA_DIR / "dashboard.json"  # old JSON-array format, migrated on startup
+STATE_FILE = REPO_ROOT / ".bot_state.pkl"  # PicklePersistence file
+LOGIN_FILE = DATA_DIR / "login.jsonl"  # append-only, one JSON object per line
+LEGACY_LOGIN_FILE = DATA_DIR / "login.json"  # old JSON-array format, migrated on startup
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 SUBMIT_URL = "https://www.fundamentaldecisions.com/2025/08/23/submission/"
 
+# Dashboard and login rows are buffered in memory and appended to disk in one write per file this often
+JSONL_FLUSH_SECONDS = 1.0
+
+# Menu-list re-renders are held this long so rapid taps on one message collapse into one edit
+RENDER_DEBOUNCE_SECONDS = 0.05
+
 # Fixed baseline: all "Before Timing" values are authored in GMT+7
 BASE_TZ_OFFSET_MINUTES = 7 * 60  # GMT+7
+BASE_TZ = timezone(timedelta(minutes=BASE_TZ_OFFSET_MINUTES))
 
 # chat_data keys:
 #   menu_id: str
-#   cards_dishes: List[Dish]
-#   list_msg_id: int  (message id of the dish list / selected card)
 #   last_menu_list_msg_id: int (message id of the menu list message)
-#   menu_subset: List[str] (the 3 menu ids currently shown)
+#   menu_subset: Tuple[str, ...] (the 3 menu ids currently shown; also the render cache key)
+#   last_render: Tuple[int, int] (message id + hash of the last text/keyboard sent via edit_if_changed)
+# Dish buttons carry their own state as "sel:<menu_id>:<slot HH:MM:SS>:<index in slot>",
+# so picking a dish needs nothing from chat_data.
 # user_data keys (optional utils):
 #   tz_offset_minutes: int
 #   tz_name: str
@@ -59,12 +81,30 @@ COMMANDS_HELP = (
     "• /faq — About the bot & frequently asked questions\n"
     "• /my_dashboard — List of Challenges selected"
 )
+USE_BUTTONS_TEXT = "Please use the buttons or commands below 😊\n" + COMMANDS_HELP
+
+START_INTRO = (
+    "👋 Hellooooo, <b>I’m Your Bot for Daily Challenges!!</b>\n\n"
+    "Every day, I’ll give you a fresh menu of dishes 🍽️.\n"
+    "But here’s the twist: each dish comes with a fun challenge designed too test your "
+    "Mindset in Action.\n\n"
+    "Pick a dish → unlock a challenge → complete it within 24 hours → submit to earn "
+    "your Persona Card 🎴.\n\n"
+    "Ready to order?"
+)
 
 # ───────────────────────────────────────────────────────────────────────────────
 # Data models & globals
 # ───────────────────────────────────────────────────────────────────────────────
-@dataclass
+@dataclass(frozen=True)
 class Dish:
+    # Explicit __slots__ (dataclass(slots=True) needs 3.10; PTB 21 still supports 3.9)
+    __slots__ = (
+        "menu_id", "menu_name", "dish", "price", "tagline", "nutrition", "challenge", "challenge_id",
+        "best_timing", "before_timing_raw", "before_time", "price_text", "dish_html", "tagline_html",
+        "nutrition_html", "card_html", "challenge_message",
+    )
+
     menu_id: str
     menu_name: str
     dish: str
@@ -76,29 +116,222 @@ class Dish:
     best_timing: str
     before_timing_raw: str
     before_time: dtime  # interpreted in GMT+7
+    price_text: str  # fmt_price(price), rendered once at load
+    # HTML-escaped copies of the text fields above, also computed at load
+    dish_html: str
+    tagline_html: str
+    nutrition_html: str
+    card_html: str  # selected-dish card shown in place of the dish list
+    challenge_message: str  # full challenge reply, minus the per-user submission ID line
 
 MENUS_BY_ID: Dict[str, str] = {}
 DISHES_BY_MENU: Dict[str, List[Dish]] = {}
 MENUS_FOR_WHO: Dict[str, str] = {}  # “For who” text per menu
+MENU_BUTTONS: Dict[str, InlineKeyboardButton] = {}  # built once in init_data()
+MENU_IDS: Tuple[str, ...] = ()  # menus with dishes, for the random pick
+MENU_LIST_IDS: Tuple[str, ...] = ()  # MENUS_BY_ID keys, sampled for the 3-menu list
+MENU_INTRO_LINES: Dict[str, str] = {}  # rendered "<b>name</b> — <i>for who</i>" per menu
+MENU_NAME_HTML: Dict[str, str] = {}  # escaped display name per menu id (incl. "Selected Menu" fallback)
+MENU_SELECTED_HTML: Dict[str, str] = {}  # "Menu: <b>name</b> — <i>for who</i>" shown once a menu is picked
+# Per menu: sorted distinct before_time slots, and the dishes of each slot (in file order)
+SLOTS_BY_MENU: Dict[str, Tuple[List[dtime], Dict[dtime, List[Dish]]]] = {}
+
+# Parsed JSON files kept in memory; "stamp" is the (mtime_ns, size) they were read at
+# FAQ also keeps "html": the /faq reply, rendered for the "data" list in "rendered"
+_FAQ_CACHE: Dict = {"stamp": None, "data": None, "html": "", "rendered": None}
+# Dashboard also keeps "by_user": str(user_id) -> rows, built for the "data" list it was indexed from,
+# and "pending": rows already in "data" but still queued for the file (re-added whenever it is re-read)
+_DASHBOARD_CACHE: Dict = {"stamp": None, "data": None, "by_user": {}, "indexed": None, "pending": []}
+# JSON Lines files whose parsed rows are cached, so our own appends can keep the cache in sync
+_JSONL_CACHES: Dict[Path, Dict] = {DASHBOARD_FILE: _DASHBOARD_CACHE}
+# (file, serialized line) pairs awaiting the flusher; None (not running under the app) means write through
+_jsonl_queue: Optional["asyncio.Queue[Tuple[Path, bytes]]"] = None
+# Append-mode handles, opened on first write and kept until close_jsonl_files()
+_JSONL_FILES: Dict[Path, BinaryIO] = {}
+# Last formatted UTC second, shared by every log row written within it
+_UTC_STAMP: Dict = {"sec": None, "date": "", "datetime": ""}
+
+# Debounced edits keyed by (chat_id, message_id): only the latest pending render is sent.
+# Each entry also carries its last_render value, so a failed edit can forget it again.
+_PENDING_EDITS: Dict[Tuple[int, int], Tuple[str, Optional[InlineKeyboardMarkup], Tuple[int, int]]] = {}
+_EDIT_TASKS: Dict[Tuple[int, int], asyncio.Task] = {}
+
+# Static buttons shared by every keyboard (PTB objects are immutable)
+RANDOM_PICK_BUTTON = InlineKeyboardButton("🎲 Random pick", callback_data="r")
+BACK_TO_MENUS_BUTTON = InlineKeyboardButton("↩️ Back to menus", callback_data="b")
+START_KEYBOARD = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("👉 Let’s see What’s on the Menu today?", callback_data="list")]]
+)
+SEE_MENUS_KEYBOARD = InlineKeyboardMarkup([[InlineKeyboardButton("🍽️ See menus", callback_data="list")]])
 
 # ───────────────────────────────────────────────────────────────────────────────
 # Utilities
 # ───────────────────────────────────────────────────────────────────────────────
 def escape_html(text: str) -> str:
+    if not ("&" in text or "<" in text or ">" in text):
+        return text  # common case: nothing to escape, no intermediate copies
     return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
 def fmt_price(p: float) -> str:
     return f"${p:,.2f}" if p else ""
 
-def _append_json_row(file_path: Path, entry: Dict) -> None:
-    rows: List[Dict] = []
-    if file_path.exists():
+def json_loads(raw: bytes):
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+# stdlib fallback for compact dumps, built once instead of per json.dumps() call
+_compact_json_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+def json_dumps(obj, pretty: bool = False) -> bytes:
+    """UTF-8 JSON bytes; compact by default, 2-space indented when `pretty`."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return _compact_json_encode(obj).encode("utf-8")
+
+def utc_stamp(now_utc: Optional[datetime] = None) -> Tuple[str, str]:
+    """("YYYY-MM-DD", "YYYY-MM-DD HH:MM:SS") in UTC; strftime runs only when the second changes."""
+    now = now_utc or datetime.now(timezone.utc)
+    sec = int(now.timestamp())
+    if _UTC_STAMP["sec"] != sec:
+        text = now.strftime("%Y-%m-%d %H:%M:%S")
+        _UTC_STAMP["sec"], _UTC_STAMP["date"], _UTC_STAMP["datetime"] = sec, text[:10], text
+    return _UTC_STAMP["date"], _UTC_STAMP["datetime"]
+
+def _file_stamp(file_path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = file_path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _read_json_cached(file_path: Path, cache: Dict) -> List[Dict]:
+    """Parsed rows of a JSON-array file, re-read only when its mtime/size changes."""
+    stamp = _file_stamp(file_path)
+    if stamp is None:
+        cache["stamp"], cache["data"] = None, []
+    elif cache["data"] is None or cache["stamp"] != stamp:
         try:
-            rows = json.loads(file_path.read_text(encoding="utf-8")) or []
+            cache["data"] = json_loads(file_path.read_bytes()) or []
         except Exception:
-            rows = []
-    rows.append(entry)
-    file_path.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+            cache["data"] = []
+        cache["stamp"] = stamp
+    return cache["data"]
+
+def _read_jsonl_cached(file_path: Path, cache: Dict) -> List[Dict]:
+    """Parsed rows of a JSON Lines file plus rows still queued for it, re-read only when its mtime/size changes."""
+    stamp = _file_stamp(file_path)
+    if cache["data"] is None or cache["stamp"] != stamp:
+        rows: List[Dict] = []
+        if stamp is not None:
+            with file_path.open("rb") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rows.append(json_loads(line))
+                    except Exception:
+                        continue  # skip a torn/partial line
+        rows.extend(cache["pending"])  # not on disk yet; the file is appended in queue order
+        cache["data"], cache["stamp"] = rows, stamp
+    return cache["data"]
+
+def migrate_legacy_jsonl(legacy_path: Path, file_path: Path) -> None:
+    """One-time conversion of a JSON-array file into its .jsonl successor (the old file is left as-is)."""
+    if file_path.exists() or not legacy_path.exists():
+        return
+    try:
+        rows = json_loads(legacy_path.read_bytes()) or []
+    except Exception as e:
+        logging.warning("Could not read legacy log %s: %s", legacy_path, e)
+        return
+    # Write beside the target and rename: a crash mid-write must not leave a truncated file that counts as migrated
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    tmp_path.write_bytes(b"".join(json_dumps(r) + b"\n" for r in rows))
+    os.replace(tmp_path, file_path)
+    logging.info("Migrated %d rows to %s", len(rows), file_path)
+
+def _write_jsonl_lines(file_path: Path, lines: List[bytes]) -> None:
+    cache = _JSONL_CACHES.get(file_path)
+    in_sync = cache is not None and cache["stamp"] == _file_stamp(file_path)
+    try:
+        f = _JSONL_FILES.get(file_path)
+        if f is None:
+            f = _JSONL_FILES[file_path] = file_path.open("ab")
+        f.write(b"".join(lines))
+        f.flush()  # readers (and the stamp below) see the rows as soon as the batch is written
+    except Exception:
+        logging.exception("Could not append %d log lines to %s", len(lines), file_path)
+        f = _JSONL_FILES.pop(file_path, None)  # reopen on the next batch rather than reuse a failed handle
+        if f is not None:
+            try:
+                f.close()
+            except Exception:
+                pass
+        if cache is not None:  # rows the write lost must not stay visible: re-read file + still-queued rows
+            cache["data"] = None
+    else:
+        if in_sync:  # cache already holds these rows; don't re-parse our own write
+            cache["stamp"] = _file_stamp(file_path)
+    finally:
+        if cache is not None:  # on disk now, or dropped with a failed write: either way no longer queued
+            del cache["pending"][:len(lines)]
+
+def _append_jsonl(file_path: Path, entry: Dict) -> None:
+    line = json_dumps(entry) + b"\n"
+    cache = _JSONL_CACHES.get(file_path)
+    if cache is not None:
+        cache["pending"].append(entry)
+    if _jsonl_queue is None:
+        _write_jsonl_batch({file_path: [line]})
+    else:
+        _jsonl_queue.put_nowait((file_path, line))
+
+def _drain_jsonl_queue() -> Dict[Path, List[bytes]]:
+    pending: Dict[Path, List[bytes]] = {}
+    while _jsonl_queue is not None and not _jsonl_queue.empty():
+        file_path, line = _jsonl_queue.get_nowait()
+        pending.setdefault(file_path, []).append(line)
+    return pending
+
+def _write_jsonl_batch(pending: Dict[Path, List[bytes]]) -> None:
+    for file_path, lines in pending.items():  # each file on its own: a failed write doesn't skip the others
+        _write_jsonl_lines(file_path, lines)
+
+def flush_jsonl_queue() -> None:
+    _write_jsonl_batch(_drain_jsonl_queue())
+
+def close_jsonl_files() -> None:
+    while _JSONL_FILES:
+        _file_path, f = _JSONL_FILES.popitem()
+        f.close()
+
+async def _jsonl_flusher() -> None:
+    # Runs on the loop: one small buffered append per file per interval, so no thread or lock to coordinate
+    while True:
+        await asyncio.sleep(JSONL_FLUSH_SECONDS)
+        flush_jsonl_queue()
+
+class _StateProbe(pickle.Unpickler):
+    def persistent_load(self, pid):  # PTB pickles its Bot as a persistent id; the probe doesn't need it
+        return None
+
+def discard_unreadable_state(file_path: Path) -> None:
+    """Move aside a persistence file this version can't unpickle, so the bot starts with empty state.
+
+    Older releases stored Dish objects in chat_data; those don't load into the __slots__ Dish, and
+    PicklePersistence unpickles the whole file even though chat_data is no longer persisted.
+    """
+    if not file_path.exists():
+        return
+    try:
+        with file_path.open("rb") as f:
+            _StateProbe(f).load()
+    except Exception as e:
+        moved = file_path.with_name(file_path.name + ".unreadable")
+        os.replace(file_path, moved)
+        logging.warning("Could not load %s (%s); moved it to %s and starting with empty state", file_path, e, moved)
 
 def ensure_sample_faq() -> None:
     if FAQ_FILE.exists():
@@ -108,69 +341,101 @@ def ensure_sample_faq() -> None:
         {"q": "How do I submit my challenge?", "a": f"Use the link shown with your challenge: {SUBMIT_URL}"},
         {"q": "Can I pick multiple dishes a day?", "a": "Yes—pick any dish you like, anytime."}
     ]
-    FAQ_FILE.write_text(json.dumps(sample, ensure_ascii=False, indent=2), encoding="utf-8")
+    FAQ_FILE.write_bytes(json_dumps(sample, pretty=True))
 
 def read_faq() -> List[Dict[str, str]]:
     ensure_sample_faq()
-    try:
-        return json.loads(FAQ_FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return []
+    return _read_json_cached(FAQ_FILE, _FAQ_CACHE)
+
+def render_faq_text(items: List[Dict[str, str]]) -> str:
+    text_lines = ["<b>FAQ</b>"]
+    for i, qa in enumerate(items, 1):
+        q = escape_html(qa.get("q", ""))
+        a = escape_html(qa.get("a", ""))
+        text_lines.append(f"\n<b>{i}. {q}</b>\n{a}")
+    return "\n".join(text_lines)
 
-def append_dashboard_entry(user_id: int, challenge_id: str, dish: str, menu_name: str) -> None:
+def faq_html() -> str:
+    """The /faq reply ("" when there are no entries), re-rendered only when faq.json is re-read."""
+    items = read_faq()
+    if _FAQ_CACHE["rendered"] is not items:
+        _FAQ_CACHE["html"] = render_faq_text(items) if items else ""
+        _FAQ_CACHE["rendered"] = items
+    return _FAQ_CACHE["html"]
+
+def append_dashboard_entry(user_id: int, challenge_id: str, dish: str, menu_name: str,
+                           now_utc: Optional[datetime] = None) -> None:
     entry = {
-        "date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+        "date": utc_stamp(now_utc)[0],
         "user_id": user_id,
         "challenge_id": challenge_id,
         "dish": dish,
         "menu": menu_name,
     }
-    _append_json_row(DASHBOARD_FILE, entry)
+    # The cache shows the row right away; the file catches up on the next flush
+    by_user = _dashboard_by_user()
+    _DASHBOARD_CACHE["data"].append(entry)
+    by_user.setdefault(str(user_id), []).append(entry)
+    _append_jsonl(DASHBOARD_FILE, entry)
+
+def _dashboard_by_user() -> Dict[str, List[Dict]]:
+    rows = _read_jsonl_cached(DASHBOARD_FILE, _DASHBOARD_CACHE)
+    if _DASHBOARD_CACHE["indexed"] is not rows:  # file was (re)read: rebuild the per-user index
+        by_user: Dict[str, List[Dict]] = {}
+        for r in rows:
+            by_user.setdefault(str(r.get("user_id")), []).append(r)
+        _DASHBOARD_CACHE["by_user"], _DASHBOARD_CACHE["indexed"] = by_user, rows
+    return _DASHBOARD_CACHE["by_user"]
 
 def read_user_dashboard(user_id: int) -> List[Dict]:
-    if not DASHBOARD_FILE.exists():
-        return []
-    try:
-        rows = json.loads(DASHBOARD_FILE.read_text(encoding="utf-8")) or []
-    except Exception:
-        return []
-    return [r for r in rows if str(r.get("user_id")) == str(user_id)]
+    return _dashboard_by_user().get(str(user_id), [])
+
+# "11:00:00 AM", "11:00 AM", "23:00:00" or "23:00" — the formats "Before Timing" is authored in
+_BEFORE_TIME_RE = re.compile(r"(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?(?:\s+([AaPp][Mm]))?")
 
+@lru_cache(maxsize=1024)  # the data repeats a handful of "Before Timing" strings across every row
 def parse_before_time(value: str) -> Optional[dtime]:
-    if not value:
+    m = _BEFORE_TIME_RE.fullmatch(value.strip()) if value else None
+    if not m:
+        return None
+    hh, mm, ss, ampm = m.groups()
+    h = int(hh)
+    if ampm:
+        if not 1 <= h <= 12:
+            return None
+        h = h % 12 + (12 if ampm.upper() == "PM" else 0)
+    try:
+        return dtime(h, int(mm), int(ss or 0))
+    except ValueError:  # hour/minute/second out of range
         return None
-    value = value.strip()
-    fmts = ["%I:%M:%S %p", "%I:%M %p", "%H:%M:%S", "%H:%M"]
-    for fmt in fmts:
-        try:
-            return datetime.strptime(value, fmt).time()
-        except Exception:
-            continue
-    return None
 
 def now_in_baseline_tz() -> datetime:
-    return datetime.now(timezone.utc) + timedelta(minutes=BASE_TZ_OFFSET_MINUTES)
+    return datetime.now(BASE_TZ)
 
-def next_slot_time(today_in_base: datetime, times: List[dtime]) -> dtime:
-    if not times:
-        return dtime(0, 0)
-    now_t = today_in_base.time()
-    after = [t for t in times if t > now_t]
-    return min(after) if after else min(times)
+def build_slot_index(dishes: List[Dish]) -> Tuple[List[dtime], Dict[dtime, List[Dish]]]:
+    buckets: Dict[dtime, List[Dish]] = {}
+    for d in dishes:
+        buckets.setdefault(d.before_time, []).append(d)
+    return sorted(buckets), buckets
 
-def filter_dishes_for_next_slot_baseline(dishes: List[Dish]) -> Tuple[List[Dish], dtime]:
-    now_base = now_in_baseline_tz()
-    slots = sorted({d.before_time for d in dishes})
+def dishes_in_slot(mid: str, slot: dtime) -> List[Dish]:
+    _slots, buckets = SLOTS_BY_MENU.get(mid, ((), {}))
+    return buckets.get(slot, [])
+
+def filter_dishes_for_next_slot_baseline(mid: str) -> Tuple[List[Dish], dtime]:
+    """Dishes of the first slot after "now" (GMT+7), wrapping to the earliest slot after the last one."""
+    slots, buckets = SLOTS_BY_MENU.get(mid, ((), {}))
     if not slots:
         return [], dtime(0, 0)
-    target = next_slot_time(now_base, slots)
-    filtered = [d for d in dishes if d.before_time == target]
-    return filtered, target
+    i = bisect_right(slots, now_in_baseline_tz().time())
+    target = slots[i] if i < len(slots) else slots[0]
+    return buckets[target], target
 
 # ───────────────────────────────────────────────────────────────────────────────
 # Login logging
 # ───────────────────────────────────────────────────────────────────────────────
-def log_event(update: Update, context: ContextTypes.DEFAULT_TYPE, event: str, extra: Optional[Dict] = None) -> None:
+def log_event(update: Update, context: ContextTypes.DEFAULT_TYPE, event: str, extra: Optional[Dict] = None,
+              now_utc: Optional[datetime] = None) -> None:
     user = update.effective_user
     if not user:
         return
@@ -182,13 +447,13 @@ def log_event(update: Update, context: ContextTypes.DEFAULT_TYPE, event: str, ex
         "first_name": user.first_name or "",
         "last_name": user.last_name or "",
         "event": event,
-        "datetime_utc": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "datetime_utc": utc_stamp(now_utc)[1],
         "tz_name": tz_name,
         "tz_offset_minutes": tz_offset,
     }
     if extra:
         entry.update(extra)
-    _append_json_row(LOGIN_FILE, entry)
+    _append_jsonl(LOGIN_FILE, entry)
 
 # ───────────────────────────────────────────────────────────────────────────────
 # Data loading
@@ -199,7 +464,7 @@ def load_data() -> Tuple[Dict[str, str], Dict[str, List[Dish]]]:
     if not MENU_AND_DISHES_FILE.exists():
         raise FileNotFoundError(f"Missing file: {MENU_AND_DISHES_FILE}")
 
-    menus_raw = json.loads(MENULIST_FILE.read_text(encoding="utf-8"))
+    menus_raw = json_loads(MENULIST_FILE.read_bytes())
 
     menus_by_id: Dict[str, str] = {}
     global MENUS_FOR_WHO
@@ -216,7 +481,7 @@ def load_data() -> Tuple[Dict[str, str], Dict[str, List[Dish]]]:
             menus_by_id[mid] = name
             MENUS_FOR_WHO[mid] = for_who
 
-    dishes_raw = json.loads(MENU_AND_DISHES_FILE.read_text(encoding="utf-8"))
+    dishes_raw = json_loads(MENU_AND_DISHES_FILE.read_bytes())
     dishes_by_menu: Dict[str, List[Dish]] = {k: [] for k in menus_by_id}
     for row in dishes_raw:
         mid = str(row.get("Menu unique ID", "")).strip()
@@ -236,6 +501,10 @@ def load_data() -> Tuple[Dict[str, str], Dict[str, List[Dish]]]:
             p = float(price)
         except Exception:
             p = 0.0
+        dish_html = escape_html(dish_name)
+        price_text = fmt_price(p)
+        tagline_html = escape_html(tagline)
+        nutrition_html = escape_html(nutrition)
         dishes_by_menu.setdefault(mid, []).append(
             Dish(
                 menu_id=mid,
@@ -249,6 +518,12 @@ def load_data() -> Tuple[Dict[str, str], Dict[str, List[Dish]]]:
                 best_timing=best_timing,
                 before_timing_raw=before_raw,
                 before_time=before_t,
+                price_text=price_text,
+                dish_html=dish_html,
+                tagline_html=tagline_html,
+                nutrition_html=nutrition_html,
+                card_html=card_text(dish_html, price_text, tagline_html, nutrition_html),
+                challenge_message=render_challenge_message(dish_html, escape_html(challenge)),
             )
         )
 
@@ -259,62 +534,106 @@ def load_data() -> Tuple[Dict[str, str], Dict[str, List[Dish]]]:
 
     return menus_by_id, dishes_by_menu
 
+def init_data() -> None:
+    """Load the data files and build the lookups that stay fixed for the process lifetime."""
+    global MENUS_BY_ID, DISHES_BY_MENU, MENU_BUTTONS, MENU_IDS, MENU_LIST_IDS, MENU_INTRO_LINES, SLOTS_BY_MENU
+    global MENU_NAME_HTML, MENU_SELECTED_HTML
+    MENUS_BY_ID, DISHES_BY_MENU = load_data()
+    MENU_IDS = tuple(DISHES_BY_MENU)
+    MENU_LIST_IDS = tuple(MENUS_BY_ID)
+    MENU_INTRO_LINES = {mid: menu_intro_line(mid) for mid in MENUS_BY_ID}
+    MENU_NAME_HTML = {mid: escape_html(MENUS_BY_ID.get(mid, "Selected Menu")) for mid in DISHES_BY_MENU}
+    MENU_SELECTED_HTML = {mid: selected_menu_text(mid) for mid in DISHES_BY_MENU}
+    SLOTS_BY_MENU = {mid: build_slot_index(ds) for mid, ds in DISHES_BY_MENU.items()}
+    MENU_BUTTONS = {mid: InlineKeyboardButton(name, callback_data=f"m:{mid}") for mid, name in MENUS_BY_ID.items()}
+    dish_list_view.cache_clear()
+    render_menu_intro_text.cache_clear()
+    menu_list_keyboard.cache_clear()
+    # Render every (menu, slot) view up front; all dish buttons are built here, not on first tap
+    for mid, (slots, _buckets) in SLOTS_BY_MENU.items():
+        for slot in slots:
+            dish_list_view(mid, slot)
+
 # ───────────────────────────────────────────────────────────────────────────────
 # UI helpers
 # ───────────────────────────────────────────────────────────────────────────────
-def card_text(d: Dish) -> str:
-    price = fmt_price(d.price)
+def card_text(dish_html: str, price: str, tagline_html: str, nutrition_html: str) -> str:
     lines = [
-        f"<b>{escape_html(d.dish)}</b>" + (f" — {price}" if price else ""),
-        f"<i>{escape_html(d.tagline)}</i>" if d.tagline else "",
-        f"Nutrition Fact: {escape_html(d.nutrition)}" if d.nutrition else "",
+        f"<b>{dish_html}</b>" + (f" — {price}" if price else ""),
+        f"<i>{tagline_html}</i>" if tagline_html else "",
+        f"Nutrition Fact: {nutrition_html}" if nutrition_html else "",
     ]
     return "\n".join([ln for ln in lines if ln])
 
-def render_dish_list_text(menu_name: str, dishes: List[Dish]) -> str:
-    lines = [f"Menu: {escape_html(menu_name)}. Available food/drink as below. Tap a card to select:\n"]
+def render_challenge_message(dish_html: str, challenge_html: str) -> str:
+    """Challenge reply body for a dish; the caller appends the user's submission ID."""
+    return (
+        f"🥇 Challenge for <b>{dish_html}</b>\n\n"
+        f"{challenge_html}\n\n"
+        "🍽️ Enjoy your meal!\n"
+        "You have 24 hours to complete the challenge and submit your result here to get a Persona Card — "
+        "a snapshot of your mindset in action:\n"
+        f"<a href=\"{SUBMIT_URL}\">{SUBMIT_URL}</a>\n\n"
+    )
+
+def render_dish_list_text(menu_name_html: str, dishes: List[Dish]) -> str:
+    parts = [f"Menu: {menu_name_html}. Available food/drink as below. Tap a card to select:\n"]
     for i, d in enumerate(dishes, 1):
-        price = fmt_price(d.price)
-        lines.append(
-            "\n".join([
-                f"<b>{i}) {escape_html(d.dish)}</b>" + (f" — {price}" if price else ""),
-                f"<i>{escape_html(d.tagline)}</i>" if d.tagline else "",
-                f"Nutrition Fact: {escape_html(d.nutrition)}" if d.nutrition else "",
-                ""
-            ])
-        )
-    return "\n".join(lines).strip()
+        price = d.price_text
+        parts.append(f"<b>{i}) {d.dish_html}</b>" + (f" — {price}" if price else ""))
+        if d.tagline:
+            parts.append(f"<i>{d.tagline_html}</i>")
+        if d.nutrition:
+            parts.append(f"Nutrition Fact: {d.nutrition_html}")
+        parts.append("")  # blank line between dishes
+    return "\n".join(parts).strip()
 
 def build_dish_buttons(dishes: List[Dish]) -> InlineKeyboardMarkup:
     rows = []
     for i, d in enumerate(dishes, 1):
-        rows.append([InlineKeyboardButton(f"{i}) {d.dish}", callback_data=f"sel:{i-1}")])
-    rows.append([InlineKeyboardButton("↩️ Back to menus", callback_data="b")])
+        callback = f"sel:{d.menu_id}:{d.before_time.isoformat()}:{i-1}"
+        rows.append([InlineKeyboardButton(f"{i}) {d.dish}", callback_data=callback)])
+    rows.append([BACK_TO_MENUS_BUTTON])
     return InlineKeyboardMarkup(rows)
 
-def pick_menu_subset() -> List[str]:
-    ids = list(MENUS_BY_ID.keys())
-    random.shuffle(ids)
-    return ids[: min(3, len(ids))]
+@lru_cache(maxsize=None)
+def dish_list_view(mid: str, slot: dtime) -> Tuple[str, InlineKeyboardMarkup]:
+    """Dish list text + buttons for one menu slot; identical for every user, so built once."""
+    dishes = dishes_in_slot(mid, slot)
+    return render_dish_list_text(menu_name_html(mid), dishes), build_dish_buttons(dishes)
+
+def pick_menu_subset() -> Tuple[str, ...]:
+    return tuple(random.sample(MENU_LIST_IDS, min(3, len(MENU_LIST_IDS))))
 
-def render_menu_intro_text(subset_ids: List[str]) -> str:
+def menu_name_html(mid: str) -> str:
+    return MENU_NAME_HTML.get(mid) or escape_html(MENUS_BY_ID.get(mid, "Selected Menu"))
+
+def selected_menu_text(mid: str) -> str:
+    intro = MENUS_FOR_WHO.get(mid, "")
+    return f"Menu: <b>{menu_name_html(mid)}</b>" + (f" — <i>{escape_html(intro)}</i>" if intro else "")
+
+def menu_intro_line(mid: str) -> str:
+    name = MENUS_BY_ID.get(mid, "")
+    intro = MENUS_FOR_WHO.get(mid, "")
+    if intro:
+        return f"<b>{escape_html(name)}</b> — <i>{escape_html(intro)}</i>"
+    return f"<b>{escape_html(name)}</b>"
+
+@lru_cache(maxsize=1024)  # 11 menus give under 1000 ordered 3-menu subsets
+def render_menu_intro_text(subset_ids: Tuple[str, ...]) -> str:
     """Formatted list (bold name + italic intro) above the buttons — fully visible."""
     lines = ["Select a Menu below.\n"]
     for mid in subset_ids:
-        name = MENUS_BY_ID.get(mid, "")
-        intro = MENUS_FOR_WHO.get(mid, "")
-        if intro:
-            lines.append(f"<b>{escape_html(name)}</b> — <i>{escape_html(intro)}</i>")
-        else:
-            lines.append(f"<b>{escape_html(name)}</b>")
+        lines.append(MENU_INTRO_LINES.get(mid) or menu_intro_line(mid))
     return "\n".join(lines)
 
-def menu_list_keyboard(subset_ids: List[str]) -> InlineKeyboardMarkup:
+@lru_cache(maxsize=1024)  # same keys as render_menu_intro_text(); PTB markups are immutable, so shared
+def menu_list_keyboard(subset_ids: Tuple[str, ...]) -> InlineKeyboardMarkup:
     """Buttons show *only names* to avoid truncation; full text is in the message above."""
-    rows = [[InlineKeyboardButton("🎲 Random pick", callback_data="r")]]
+    rows = [[RANDOM_PICK_BUTTON]]
     for mid in subset_ids:
-        name = MENUS_BY_ID.get(mid, mid)
-        rows.append([InlineKeyboardButton(name, callback_data=f"m:{mid}")])
+        button = MENU_BUTTONS.get(mid) or InlineKeyboardButton(MENUS_BY_ID.get(mid, mid), callback_data=f"m:{mid}")
+        rows.append([button])
     return InlineKeyboardMarkup(rows)
 
 # ───────────────────────────────────────────────────────────────────────────────
@@ -322,22 +641,7 @@ def menu_list_keyboard(subset_ids: List[str]) -> InlineKeyboardMarkup:
 # ───────────────────────────────────────────────────────────────────────────────
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     log_event(update, context, "start")
-    intro = (
-        "👋 Hellooooo, <b>I’m Your Bot for Daily Challenges!!</b>\n\n"
-        "Every day, I’ll give you a fresh menu of dishes 🍽️.\n"
-        "But here’s the twist: each dish comes with a fun challenge designed too test your "
-        "Mindset in Action.\n\n"
-        "Pick a dish → unlock a challenge → complete it within 24 hours → submit to earn "
-        "your Persona Card 🎴.\n\n"
-        "Ready to order?"
-    )
-    await update.message.reply_text(
-        intro,
-        parse_mode=constants.ParseMode.HTML,
-        reply_markup=InlineKeyboardMarkup(
-            [[InlineKeyboardButton("👉 Let’s see What’s on the Menu today?", callback_data="list")]]
-        ),
-    )
+    await update.message.reply_text(START_INTRO, parse_mode=constants.ParseMode.HTML, reply_markup=START_KEYBOARD)
 
 async def cmd_today(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     log_event(update, context, "today")
@@ -375,16 +679,11 @@ async def cmd_set_tzname(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 async def cmd_faq(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     log_event(update, context, "faq")
-    items = read_faq()
-    if not items:
+    text = faq_html()
+    if not text:
         await update.message.reply_text("FAQ is empty.")
         return
-    text_lines = ["<b>FAQ</b>"]
-    for i, qa in enumerate(items, 1):
-        q = escape_html(qa.get("q", ""))
-        a = escape_html(qa.get("a", ""))
-        text_lines.append(f"\n<b>{i}. {q}</b>\n{a}")
-    await update.message.reply_text("\n".join(text_lines), parse_mode=constants.ParseMode.HTML, disable_web_page_preview=True)
+    await update.message.reply_text(text, parse_mode=constants.ParseMode.HTML, disable_web_page_preview=True)
 
 async def cmd_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     log_event(update, context, "my_dashboard")
@@ -406,7 +705,7 @@ async def cmd_debug_time(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     now_base = now_in_baseline_tz()
     mid = context.chat_data.get("menu_id")
     if mid and mid in DISHES_BY_MENU and DISHES_BY_MENU[mid]:
-        filtered, _ = filter_dishes_for_next_slot_baseline(DISHES_BY_MENU[mid])
+        filtered, _ = filter_dishes_for_next_slot_baseline(mid)
         await update.message.reply_text(
             f"Baseline time: {now_base.strftime('%Y-%m-%d %I:%M:%S %p')} (GMT+7)\n"
             f"Dishes available in the next slot: {len(filtered)}"
@@ -419,206 +718,245 @@ async def cmd_debug_time(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 async def on_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     log_event(update, context, "free_text_blocked", {"text": update.message.text if update.message else ""})
-    await update.message.reply_text(
-        "Please use the buttons or commands below 😊\n" + COMMANDS_HELP,
-        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🍽️ See menus", callback_data="list")]]),
-    )
-
-async def on_button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    query = update.callback_query
-    data = query.data
-    try:
-        await query.answer()
-    except Exception:
-        pass
-
-    # Show menus (3 random) with full *formatted* descriptions above the buttons
-    if data == "list":
-        context.chat_data.clear()
-        log_event(update, context, "menu_list_opened")
-        subset = pick_menu_subset()
-        context.chat_data["menu_subset"] = subset
-        text = render_menu_intro_text(subset)
-        await query.edit_message_text(text, parse_mode=constants.ParseMode.HTML, reply_markup=menu_list_keyboard(subset))
-        context.chat_data["last_menu_list_msg_id"] = query.message.message_id
+    await update.message.reply_text(USE_BUTTONS_TEXT, reply_markup=SEE_MENUS_KEYBOARD)
+
+def _markup_signature(markup: Optional[InlineKeyboardMarkup]) -> Tuple[Tuple[str, Optional[str]], ...]:
+    if markup is None:
+        return ()
+    return tuple((b.text, b.callback_data) for row in markup.inline_keyboard for b in row)
+
+async def _flush_pending_edit(bot, chat_data: Dict, key: Tuple[int, int]) -> None:
+    await asyncio.sleep(RENDER_DEBOUNCE_SECONDS)
+    _EDIT_TASKS.pop(key, None)
+    pending = _PENDING_EDITS.pop(key, None)
+    if pending is None:
         return
-
-    # Random menu
-    if data == "r":
-        mid = random.choice(list(DISHES_BY_MENU.keys()))
-        context.chat_data["menu_id"] = mid
-        menu_name = MENUS_BY_ID.get(mid, "Selected Menu")
-        intro = MENUS_FOR_WHO.get(mid, "")
-        selected_text = (
-            f"Menu: <b>{escape_html(menu_name)}</b>"
-            + (f" — <i>{escape_html(intro)}</i>" if intro else "")
+    text, markup, render = pending
+    chat_id, message_id = key
+    try:
+        await bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=text,
+            parse_mode=constants.ParseMode.HTML,
+            reply_markup=markup,
         )
-        log_event(update, context, "menu_random", {"menu_id": mid, "menu_name": menu_name})
-
-        # Collapse the menu list message to just the selected menu (with intro)
-        menu_list_id = context.chat_data.get("last_menu_list_msg_id")
-        if menu_list_id:
-            try:
-                await context.bot.edit_message_text(
-                    chat_id=query.message.chat_id,
-                    message_id=menu_list_id,
-                    text=selected_text,
-                    parse_mode=constants.ParseMode.HTML,
-                )
-            except Exception as e:
-                logging.warning("Could not edit menu list to selected name: %s", e)
-        else:
-            try:
-                await query.edit_message_text(
-                    text=selected_text,
-                    parse_mode=constants.ParseMode.HTML,
-                )
-                context.chat_data["last_menu_list_msg_id"] = query.message.message_id
-            except Exception:
-                pass
-
-        await show_filtered_cards_send_new(query, context)
-        return
-
-    # Specific menu
-    if data.startswith("m:"):
-        mid = data.split(":", 1)[1]
-        if mid not in DISHES_BY_MENU:
-            await query.edit_message_text("Sorry, that menu is unavailable.")
+    except Exception as e:
+        # "Not modified" means the message already shows this screen (e.g. an identical render after a restart)
+        if isinstance(e, BadRequest) and "not modified" in str(e).lower():
             return
-        context.chat_data["menu_id"] = mid
-        menu_name = MENUS_BY_ID.get(mid, "Selected Menu")
-        intro = MENUS_FOR_WHO.get(mid, "")
-        selected_text = (
-            f"Menu: <b>{escape_html(menu_name)}</b>"
-            + (f" — <i>{escape_html(intro)}</i>" if intro else "")
-        )
-        log_event(update, context, "menu_selected", {"menu_id": mid, "menu_name": menu_name})
+        logging.warning("Could not apply debounced edit: %s", e)
+        if chat_data.get("last_render") == render:  # not shown, so don't skip the next identical render
+            chat_data.pop("last_render", None)
+
+def cancel_pending_edit(chat_id: int, message_id: int) -> bool:
+    key = (chat_id, message_id)
+    task = _EDIT_TASKS.pop(key, None)
+    if task:
+        task.cancel()
+    return _PENDING_EDITS.pop(key, None) is not None
+
+async def edit_if_changed(query, context: ContextTypes.DEFAULT_TYPE, text: str,
+                          reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+    """Queue an HTML edit of the callback's message, skipping it if the message already shows this payload.
+
+    The edit is sent after RENDER_DEBOUNCE_SECONDS; a newer render for the same message replaces it.
+    """
+    render = (query.message.message_id, hash((text, _markup_signature(reply_markup))))
+    if context.chat_data.get("last_render") == render:
+        return
+    key = (query.message.chat_id, query.message.message_id)
+    _PENDING_EDITS[key] = (text, reply_markup, render)
+    if key not in _EDIT_TASKS:
+        # Created through the application so PTB awaits an edit still pending at shutdown
+        _EDIT_TASKS[key] = context.application.create_task(_flush_pending_edit(context.bot, context.chat_data, key))
+    context.chat_data["last_render"] = render
+
+# Callback handlers, dispatched from on_button() by the callback_data opcode
+# (the part before the first ":"); `arg` is whatever follows it.
+async def _h_list(update: Update, context: ContextTypes.DEFAULT_TYPE, arg: str) -> None:
+    # Show menus (3 random) with full *formatted* descriptions above the buttons
+    query = update.callback_query
+    last_render = context.chat_data.get("last_render")
+    context.chat_data.clear()
+    if last_render:
+        context.chat_data["last_render"] = last_render
+    log_event(update, context, "menu_list_opened")
+    subset = pick_menu_subset()
+    context.chat_data["menu_subset"] = subset
+    text = render_menu_intro_text(subset)
+    await edit_if_changed(query, context, text, menu_list_keyboard(subset))
+    context.chat_data["last_menu_list_msg_id"] = query.message.message_id
+
+async def _h_random(update: Update, context: ContextTypes.DEFAULT_TYPE, arg: str) -> None:
+    query = update.callback_query
+    mid = random.choice(MENU_IDS)
+    context.chat_data["menu_id"] = mid
+    menu_name = MENUS_BY_ID.get(mid, "Selected Menu")
+    selected_text = MENU_SELECTED_HTML.get(mid) or selected_menu_text(mid)
+    log_event(update, context, "menu_random", {"menu_id": mid, "menu_name": menu_name})
 
-        # Replace the menu list with just the selected name (+ intro)
+    # Collapse the menu list message to just the selected menu (with intro)
+    menu_list_id = context.chat_data.get("last_menu_list_msg_id")
+    if menu_list_id:
         try:
-            await query.edit_message_text(
+            await context.bot.edit_message_text(
+                chat_id=query.message.chat_id,
+                message_id=menu_list_id,
                 text=selected_text,
                 parse_mode=constants.ParseMode.HTML,
-                reply_markup=None,
             )
-            context.chat_data["last_menu_list_msg_id"] = query.message.message_id
         except Exception as e:
             logging.warning("Could not edit menu list to selected name: %s", e)
-
-        await show_filtered_cards_send_new(query, context)
-        return
-
-    # Back to menus (show a fresh random 3 with full formatted text)
-    if data == "b":
-        log_event(update, context, "back_to_menus")
-        context.chat_data.pop("menu_id", None)
-        context.chat_data.pop("cards_dishes", None)
-        context.chat_data.pop("list_msg_id", None)
-        subset = pick_menu_subset()
-        context.chat_data["menu_subset"] = subset
-        text = render_menu_intro_text(subset)
+    else:
         try:
-            await query.edit_message_text(text, parse_mode=constants.ParseMode.HTML, reply_markup=menu_list_keyboard(subset))
+            await query.edit_message_text(
+                text=selected_text,
+                parse_mode=constants.ParseMode.HTML,
+            )
             context.chat_data["last_menu_list_msg_id"] = query.message.message_id
         except Exception:
             pass
+
+    await show_filtered_cards_send_new(query, context)
+
+async def _h_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, arg: str) -> None:
+    query = update.callback_query
+    mid = arg
+    if mid not in DISHES_BY_MENU:
+        await query.edit_message_text("Sorry, that menu is unavailable.")
         return
+    context.chat_data["menu_id"] = mid
+    menu_name = MENUS_BY_ID.get(mid, "Selected Menu")
+    selected_text = MENU_SELECTED_HTML.get(mid) or selected_menu_text(mid)
+    log_event(update, context, "menu_selected", {"menu_id": mid, "menu_name": menu_name})
+
+    # Replace the menu list with just the selected name (+ intro)
+    try:
+        await query.edit_message_text(
+            text=selected_text,
+            parse_mode=constants.ParseMode.HTML,
+            reply_markup=None,
+        )
+        context.chat_data["last_menu_list_msg_id"] = query.message.message_id
+    except Exception as e:
+        logging.warning("Could not edit menu list to selected name: %s", e)
+
+    await show_filtered_cards_send_new(query, context)
 
+async def _h_back(update: Update, context: ContextTypes.DEFAULT_TYPE, arg: str) -> None:
+    # Back to menus (show a fresh random 3 with full formatted text)
+    query = update.callback_query
+    log_event(update, context, "back_to_menus")
+    context.chat_data.pop("menu_id", None)
+    subset = pick_menu_subset()
+    context.chat_data["menu_subset"] = subset
+    text = render_menu_intro_text(subset)
+    await edit_if_changed(query, context, text, menu_list_keyboard(subset))
+    context.chat_data["last_menu_list_msg_id"] = query.message.message_id
+
+async def _h_select(update: Update, context: ContextTypes.DEFAULT_TYPE, arg: str) -> None:
     # Select a dish
-    if data.startswith("sel:"):
-        if "menu_id" not in context.chat_data:
-            subset = context.chat_data.get("menu_subset", pick_menu_subset())
-            text = render_menu_intro_text(subset)
-            await query.edit_message_text(text, parse_mode=constants.ParseMode.HTML, reply_markup=menu_list_keyboard(subset))
-            return
-        try:
-            idx = int(data.split(":", 1)[1])
-        except ValueError:
-            idx = 0
-
-        dishes_shown: List[Dish] = context.chat_data.get("cards_dishes", [])
-        list_msg_id: Optional[int] = context.chat_data.get("list_msg_id")
-        if not dishes_shown or idx < 0 or idx >= len(dishes_shown) or not list_msg_id:
-            subset = context.chat_data.get("menu_subset", pick_menu_subset())
-            text = render_menu_intro_text(subset)
-            await query.edit_message_text(text, parse_mode=constants.ParseMode.HTML, reply_markup=menu_list_keyboard(subset))
-            return
+    query = update.callback_query
+    mid, _, rest = arg.partition(":")
+    slot_raw, _, idx_raw = rest.rpartition(":")
+    try:
+        dishes_shown = dishes_in_slot(mid, dtime.fromisoformat(slot_raw))
+        idx = int(idx_raw)
+    except ValueError:
+        dishes_shown, idx = [], -1
+    if idx < 0 or idx >= len(dishes_shown):
+        # Stale or legacy button: send the user back to the menu list
+        subset = context.chat_data.get("menu_subset", pick_menu_subset())
+        text = render_menu_intro_text(subset)
+        await edit_if_changed(query, context, text, menu_list_keyboard(subset))
+        return
 
-        d = dishes_shown[idx]
-        chat_id = query.message.chat_id
+    d = dishes_shown[idx]
+    chat_id = query.message.chat_id
 
-        # Replace the dish list with only the selected dish details
-        try:
-            await context.bot.edit_message_text(
-                chat_id=chat_id,
-                message_id=list_msg_id,
-                text=card_text(d),
-                parse_mode=constants.ParseMode.HTML,
-                reply_markup=None,
-                disable_web_page_preview=True,
-            )
-        except Exception as e:
-            logging.warning("Could not edit dish list to selected card: %s", e)
-
-        context.chat_data["cards_dishes"] = []
-        context.chat_data["list_msg_id"] = None
-
-        # Record selection
-        user_id = update.effective_user.id
-        from_menu = MENUS_BY_ID.get(d.menu_id, d.menu_name)
-        append_dashboard_entry(user_id, d.challenge_id, d.dish, from_menu)
-        log_event(update, context, "dish_selected", {
-            "menu_id": d.menu_id,
-            "menu_name": from_menu,
-            "dish": d.dish,
-            "challenge_id": d.challenge_id,
-        })
-
-        # Send challenge
-        combined = (
-            f"🥇 Challenge for <b>{escape_html(d.dish)}</b>\n\n"
-            f"{escape_html(d.challenge)}\n\n"
-            "🍽️ Enjoy your meal!\n"
-            "You have 24 hours to complete the challenge and submit your result here to get a Persona Card — "
-            "a snapshot of your mindset in action:\n"
-            f"<a href=\"{SUBMIT_URL}\">{SUBMIT_URL}</a>\n\n"
-            f"<b>This is Your Unique ID for submission: {user_id}</b>"
-        )
-        await context.bot.send_message(
-            chat_id=chat_id,
-            text=combined,
+    # Replace the dish list (the message holding this button) with only the selected dish details
+    try:
+        await query.edit_message_text(
+            text=d.card_html,
             parse_mode=constants.ParseMode.HTML,
+            reply_markup=None,
             disable_web_page_preview=True,
         )
+    except Exception as e:
+        logging.warning("Could not edit dish list to selected card: %s", e)
 
-        await context.bot.send_message(chat_id=chat_id, text=COMMANDS_HELP)
-        return
+    # Record selection
+    user_id = update.effective_user.id
+    from_menu = MENUS_BY_ID.get(d.menu_id, d.menu_name)
+    now_utc = datetime.now(timezone.utc)  # one clock read for both records
+    append_dashboard_entry(user_id, d.challenge_id, d.dish, from_menu, now_utc=now_utc)
+    log_event(update, context, "dish_selected", {
+        "menu_id": d.menu_id,
+        "menu_name": from_menu,
+        "dish": d.dish,
+        "challenge_id": d.challenge_id,
+    }, now_utc=now_utc)
+
+    # Send challenge
+    combined = d.challenge_message + f"<b>This is Your Unique ID for submission: {user_id}</b>"
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=combined,
+        parse_mode=constants.ParseMode.HTML,
+        disable_web_page_preview=True,
+    )
 
-    # Fallback
-    await query.edit_message_text("Please use the buttons or commands below 😊\n" + COMMANDS_HELP)
+    await context.bot.send_message(chat_id=chat_id, text=COMMANDS_HELP)
+
+async def _h_fallback(update: Update, context: ContextTypes.DEFAULT_TYPE, arg: str) -> None:
+    await update.callback_query.edit_message_text(USE_BUTTONS_TEXT)
+
+CALLBACK_HANDLERS = {
+    "list": _h_list,
+    "r": _h_random,
+    "m": _h_menu,
+    "b": _h_back,
+    "sel": _h_select,
+}
+
+async def _answer_quietly(query) -> None:
+    try:
+        await query.answer()
+    except Exception:
+        pass
+
+async def on_button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+    # Don't hold the handler on the answer round-trip; Telegram doesn't need it sequenced
+    context.application.create_task(_answer_quietly(query), update=update)
+
+    # A new tap supersedes any render still queued for this message
+    if query.message and cancel_pending_edit(query.message.chat_id, query.message.message_id):
+        context.chat_data.pop("last_render", None)
+
+    op, _, arg = (query.data or "").partition(":")
+    handler = CALLBACK_HANDLERS.get(op, _h_fallback)
+    await handler(update, context, arg)
 
 # Send a new message containing filtered dishes (keep menu name message intact)
 async def show_filtered_cards_send_new(query, context: ContextTypes.DEFAULT_TYPE):
     mid = context.chat_data["menu_id"]
-    all_dishes = DISHES_BY_MENU[mid]
-    menu_name = MENUS_BY_ID.get(mid, "Selected Menu")
 
-    filtered, _slot = filter_dishes_for_next_slot_baseline(all_dishes)
+    filtered, slot = filter_dishes_for_next_slot_baseline(mid)
 
     if not filtered:
         await context.bot.send_message(
             chat_id=query.message.chat_id,
-            text=f"Menu: {escape_html(menu_name)}. No dishes available right now. Please check back later.",
+            text=f"Menu: {menu_name_html(mid)}. No dishes available right now. Please check back later.",
             parse_mode=constants.ParseMode.HTML,
             disable_web_page_preview=True,
         )
         return
 
-    body = render_dish_list_text(menu_name, filtered)
-    keyboard = build_dish_buttons(filtered)
+    body, keyboard = dish_list_view(mid, slot)
 
-    msg = await context.bot.send_message(
+    await context.bot.send_message(
         chat_id=query.message.chat_id,
         text=body,
         parse_mode=constants.ParseMode.HTML,
@@ -626,9 +964,6 @@ async def show_filtered_cards_send_new(query, context: ContextTypes.DEFAULT_TYPE
         disable_web_page_preview=True,
     )
 
-    context.chat_data["cards_dishes"] = filtered
-    context.chat_data["list_msg_id"] = msg.message_id
-
 # ───────────────────────────────────────────────────────────────────────────────
 # Error handler
 # ───────────────────────────────────────────────────────────────────────────────
@@ -649,8 +984,13 @@ async def on_error(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
 def main() -> None:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
-    global MENUS_BY_ID, DISHES_BY_MENU
-    MENUS_BY_ID, DISHES_BY_MENU = load_data()
+    try:  # optional libuv-backed event loop; run_polling() picks up the policy
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+    init_data()
     if not MENUS_BY_ID:
         raise RuntimeError("No menus found; check Menulist.json")
     if not DISHES_BY_MENU:
@@ -659,15 +999,36 @@ def main() -> None:
         raise RuntimeError("BOT_TOKEN environment variable is not set")
 
     ensure_sample_faq()
-
-    persistence = PicklePersistence(filepath=str(REPO_ROOT / ".bot_state.pkl"))
+    discard_unreadable_state(STATE_FILE)
+    migrate_legacy_jsonl(LEGACY_DASHBOARD_FILE, DASHBOARD_FILE)
+    migrate_legacy_jsonl(LEGACY_LOGIN_FILE, LOGIN_FILE)
+
+    # Only user_data (timezone) is worth keeping across restarts; chat_data holds
+    # per-screen ids that are rebuilt on the next tap. PTB batches flushes every update_interval seconds.
+    persistence = PicklePersistence(
+        filepath=str(STATE_FILE),
+        store_data=PersistenceInput(bot_data=False, chat_data=False, callback_data=False),
+    )
     app = ApplicationBuilder().token(BOT_TOKEN).persistence(persistence).build()
 
+    flusher: Optional[asyncio.Task] = None
+
     async def _post_init(app_):
+        global _jsonl_queue
+        nonlocal flusher
         me = await app_.bot.get_me()
         logging.info("Bot started as @%s (id=%s). Waiting for messages… [MENU INTRO ABOVE BUTTONS]", me.username, me.id)
         await app_.bot.delete_webhook(drop_pending_updates=False)
+        _jsonl_queue = asyncio.Queue()
+        flusher = asyncio.create_task(_jsonl_flusher())
+
+    async def _post_shutdown(app_):
+        if flusher:
+            flusher.cancel()
+        flush_jsonl_queue()
+        close_jsonl_files()
     app.post_init = _post_init
+    app.post_shutdown = _post_shutdown
 
     app.add_handler(CommandHandler("start", cmd_start))
     app.add_handler(CommandHandler("today", cmd_today))